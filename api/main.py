@@ -1,34 +1,158 @@
 # api/main.py
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
-import uuid
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    ValidationError,
+    field_validator,
+)
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import logging.handlers
+import queue
+from pathlib import Path
+
+import orjson
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, make_asgi_app
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from config.settings import LOG_FORMAT, close_ollama_client, get_settings
+from database.db import engine, get_pool_stats, warm_page_cache
+from database.models import LLMRequest, LLMRequestContent, generate_request_id, now_ms
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# ---------------------------
+# orjson Request Parsing
+# ---------------------------
+# Responses use ORJSONResponse; request bodies are parsed with orjson too by
+# swapping in a Request whose json() skips the stdlib parser.
+
+class ORJSONRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Any]]:
+        original_handler = super().get_route_handler()
+
+        async def orjson_route_handler(request: Request):
+            return await original_handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
 
-# later we will import real DB logic
-# from database.db import get_session
-# from database.models import LLMRequest
 
 app = FastAPI(
     title="AI Observability Platform",
     description="Local-first LLM observability ingestion service",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
+app.router.route_class = ORJSONRoute
+
+
+# ---------------------------
+# Prometheus Metrics
+# ---------------------------
+# Served at /metrics. Metrics are per process; with several uvicorn workers
+# each scrape hits one worker.
+
+TELEMETRY_INGESTED = Counter(
+    "telemetry_ingested_total",
+    "Telemetry events accepted for storage",
+    ["app_id"],
+)
+TELEMETRY_INGEST_SECONDS = Histogram(
+    "telemetry_ingest_seconds",
+    "Time spent handling a telemetry ingestion request",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+TELEMETRY_DROPPED = Counter(
+    "telemetry_dropped_total",
+    "Telemetry events acknowledged but never written (batch failed twice)",
+)
+TELEMETRY_QUEUE_DEPTH = Gauge(
+    "telemetry_queue_depth",
+    "Telemetry events waiting to be written",
+)
+TELEMETRY_QUEUE_DEPTH.set_function(
+    lambda: telemetry_queue.qsize() if telemetry_queue is not None else 0
+)
+
+
+class DBPoolCollector(Collector):
+    """Reports connection pool stats at scrape time."""
+
+    def collect(self):
+        stats = get_pool_stats()
+        yield CounterMetricFamily(
+            "db_pool_connects", "New DB connections opened", value=stats["connects"]
+        )
+        yield CounterMetricFamily(
+            "db_pool_checkouts", "Connections checked out of the pool", value=stats["checkouts"]
+        )
+        yield GaugeMetricFamily("db_pool_size", "Configured pool size", value=stats["size"])
+        yield GaugeMetricFamily(
+            "db_pool_checked_out", "Connections currently in use", value=stats["checked_out"]
+        )
+        yield GaugeMetricFamily(
+            "db_pool_overflow", "Connections open beyond pool_size", value=stats["overflow"]
+        )
+
+
+REGISTRY.register(DBPoolCollector())
+app.mount("/metrics", make_asgi_app())
 
 
 # ---------------------------
 # Pydantic Schemas
 # ---------------------------
 
+# Largest value SQLite can store in an INTEGER column; anything above it
+# would only fail later, in the batch writer
+SQLITE_MAX_INT = 2**63 - 1
+
+
 class TelemetryEvent(BaseModel):
+    # Reject oversized prompts/responses outright rather than storing them;
+    # protected_namespaces=() allows the model_name field
+    model_config = ConfigDict(str_max_length=1_000_000, protected_namespaces=())
+
     app_id: str = Field(..., example="chatbot-v1")
     model_name: str = Field(..., example="gpt-4o-mini")
     prompt: str
     response: str
-    latency_ms: int = Field(..., ge=0)
-    token_count: Optional[int] = None
-    timestamp: Optional[datetime] = None
+    latency_ms: int = Field(..., ge=0, le=SQLITE_MAX_INT)
+    token_count: Optional[int] = Field(None, ge=0, le=SQLITE_MAX_INT)
+    timestamp: Optional[int] = Field(
+        None, ge=0, le=SQLITE_MAX_INT, description="Epoch milliseconds"
+    )
+    metadata: Optional[Dict[str, Any]] = None
+
+    @field_validator("metadata")
+    @classmethod
+    def metadata_must_be_storable(cls, value: Optional[Dict[str, Any]]):
+        # Stored with orjson (ORJSONBlob), which rejects e.g. integers
+        # outside 64 bits; fail here with a 422 rather than in the writer
+        if value is not None:
+            try:
+                orjson.dumps(value)
+            except orjson.JSONEncodeError as exc:
+                raise ValueError(f"metadata is not JSON-serializable: {exc}") from exc
+        return value
 
 
 class TelemetryResponse(BaseModel):
@@ -36,12 +160,224 @@ class TelemetryResponse(BaseModel):
     status: str
 
 
+class TelemetryBatchResponse(BaseModel):
+    request_ids: List[str]
+    status: str
+
+
+# Built once at import; validates a whole JSON array in a single call
+TELEMETRY_BATCH_ADAPTER = TypeAdapter(List[TelemetryEvent])
+
+
+# ---------------------------
+# Logging
+# ---------------------------
+# Request handlers only push records onto an in-memory queue; a
+# QueueListener thread does the formatting and file I/O.
+
+_log_handler: Optional[logging.handlers.QueueHandler] = None
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@app.on_event("startup")
+async def start_logging():
+    global _log_handler, _log_listener
+
+    Path(settings.log_file).parent.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        settings.log_file,
+        maxBytes=settings.log_max_bytes,
+        backupCount=settings.log_backup_count,
+        delay=True,
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _log_handler = logging.handlers.QueueHandler(log_queue)
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+
+    logger.addHandler(_log_handler)
+    logger.setLevel(settings.log_level)
+    logger.propagate = False
+    _log_listener.start()
+
+
+# ---------------------------
+# Batched Writer
+# ---------------------------
+# /log only enqueues records; a single background task drains the queue and
+# writes each batch with one executemany INSERT inside one transaction, so
+# SQLite pays for one commit per batch instead of one per request.
+
+# Each queued item is an (llm_requests row, llm_request_contents row) pair
+TelemetryRows = Tuple[Dict[str, Any], Dict[str, Any]]
+
+telemetry_queue: Optional["asyncio.Queue[TelemetryRows]"] = None
+_flush_task: Optional[asyncio.Task] = None
+_checkpoint_task: Optional[asyncio.Task] = None
+
+# Built once; ingest goes through Core so no ORM objects, identity map or
+# unit-of-work bookkeeping are involved. The ORM is kept for reads.
+INSERT_STMT = LLMRequest.__table__.insert()
+CONTENT_INSERT_STMT = LLMRequestContent.__table__.insert()
+
+
+def _write_batch(batch: List[TelemetryRows]) -> None:
+    with engine.begin() as conn:
+        conn.execute(INSERT_STMT, [request_row for request_row, _ in batch])
+        conn.execute(CONTENT_INSERT_STMT, [content_row for _, content_row in batch])
+
+
+# Pause before retrying a failed batch, e.g. when another worker process
+# held the SQLite write lock for longer than busy_timeout
+WRITE_RETRY_DELAY_S = 0.5
+
+
+def _write_rows_individually(batch: List[TelemetryRows]) -> int:
+    """Write each row pair in its own transaction; return how many failed."""
+    failed = 0
+    for rows in batch:
+        try:
+            _write_batch([rows])
+        except Exception:
+            logger.exception("Dropping telemetry row %s", rows[0].get("id"))
+            failed += 1
+    return failed
+
+
+async def _write_batch_with_retry(batch: List[TelemetryRows]) -> None:
+    """
+    Write a batch, retrying once.
+
+    If the retry fails too, the rows are written one at a time so a single
+    bad row only drops itself; rows that still fail are counted as dropped.
+    """
+    try:
+        await asyncio.to_thread(_write_batch, batch)
+        return
+    except Exception:
+        logger.warning(
+            "Failed to write telemetry batch of %d rows, retrying", len(batch), exc_info=True
+        )
+
+    await asyncio.sleep(WRITE_RETRY_DELAY_S)
+    try:
+        await asyncio.to_thread(_write_batch, batch)
+        return
+    except Exception:
+        logger.warning(
+            "Retry of telemetry batch of %d rows failed, writing rows individually",
+            len(batch),
+            exc_info=True,
+        )
+
+    failed = await asyncio.to_thread(_write_rows_individually, batch)
+    if failed:
+        TELEMETRY_DROPPED.inc(failed)
+
+
+async def flush_worker() -> None:
+    """Drain the telemetry queue in batches of size or time, whichever first."""
+    loop = asyncio.get_running_loop()
+    interval = settings.ingest_flush_interval_ms / 1000
+
+    while True:
+        batch = [await telemetry_queue.get()]
+        deadline = loop.time() + interval
+
+        while True:
+            # Take whatever is already queued without suspending; only fall
+            # back to a timed wait when the queue is empty
+            while len(batch) < settings.ingest_batch_size:
+                try:
+                    batch.append(telemetry_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            remaining = deadline - loop.time()
+            if len(batch) >= settings.ingest_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(telemetry_queue.get(), remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await _write_batch_with_retry(batch)
+        finally:
+            for _ in batch:
+                telemetry_queue.task_done()
+
+
+def _checkpoint_wal() -> None:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+
+
+async def checkpoint_worker() -> None:
+    """
+    Periodically checkpoint the SQLite WAL from a worker thread.
+
+    With synchronous=NORMAL, commits don't fsync; the fsyncs happen when
+    the WAL is checkpointed. Left to wal_autocheckpoint, that happens inside
+    whichever batch commit crosses the threshold and stalls the flush
+    worker. Checkpointing on a timer keeps the WAL below the threshold so
+    the fsyncs happen here instead. PASSIVE never blocks the writer.
+    """
+    interval = settings.wal_checkpoint_interval_s
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_checkpoint_wal)
+        except Exception:
+            logger.exception("WAL checkpoint failed")
+
+
+@app.on_event("startup")
+async def start_flush_worker():
+    global telemetry_queue, _flush_task, _checkpoint_task
+
+    # Tables are created by scripts/init_db.py, not here: with several
+    # uvicorn workers, concurrent create_all calls race on a fresh database
+    warm_page_cache()
+    telemetry_queue = asyncio.Queue(maxsize=settings.ingest_queue_size)
+    _flush_task = asyncio.create_task(flush_worker())
+
+    if settings.database_url.startswith("sqlite") and settings.wal_checkpoint_interval_s > 0:
+        _checkpoint_task = asyncio.create_task(checkpoint_worker())
+
+
+@app.on_event("shutdown")
+async def stop_flush_worker():
+    # Flush everything still buffered before the worker goes away
+    await telemetry_queue.join()
+    _flush_task.cancel()
+    if _checkpoint_task is not None:
+        _checkpoint_task.cancel()
+    # Closes pooled connections, which runs PRAGMA optimize on SQLite
+    engine.dispose()
+
+
+@app.on_event("shutdown")
+async def stop_ollama_client():
+    await close_ollama_client()
+
+
+@app.on_event("shutdown")
+async def stop_logging():
+    logger.removeHandler(_log_handler)
+    _log_listener.stop()  # flushes records still in the queue
+
+
 # ---------------------------
 # Health Check
 # ---------------------------
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
 
@@ -49,40 +385,102 @@ def health_check():
 # Telemetry Ingestion
 # ---------------------------
 
-@app.post("/log", response_model=TelemetryResponse)
-def log_telemetry(event: TelemetryEvent):
-    """
-    Ingests LLM request/response telemetry.
+def _to_rows(event: TelemetryEvent) -> TelemetryRows:
     """
+    Map a validated event onto llm_requests and llm_request_contents rows.
 
-    request_id = str(uuid.uuid4())
-
-    # ensure timestamp exists
-    event_timestamp = event.timestamp or datetime.utcnow()
-
-    # 🚧 TEMPORARY PLACEHOLDER
-    # This will be replaced with real DB logic
-    telemetry_record = {
+    Written out field by field on purpose: this runs once per ingested
+    event, and literal dicts avoid model_dump() or looping over the table
+    columns. Keep it in sync with the models by hand.
+    """
+    request_id = generate_request_id()
+    request_row = {
         "id": request_id,
         "app_id": event.app_id,
         "model_name": event.model_name,
-        "prompt": event.prompt,
-        "response": event.response,
         "latency_ms": event.latency_ms,
         "token_count": event.token_count,
-        "timestamp": event_timestamp,
+        # ensure timestamp exists
+        "created_at_ms": event.timestamp or now_ms(),
+        "request_metadata": event.metadata,
     }
+    content_row = {
+        "request_id": request_id,
+        "prompt": event.prompt,
+        "response": event.response,
+    }
+    return request_row, content_row
+
+
+@app.post("/log", response_model=TelemetryResponse)
+async def log_telemetry(event: TelemetryEvent) -> TelemetryResponse:
+    """
+    Ingests LLM request/response telemetry.
+
+    Declared async so requests run directly on the event loop instead of
+    being dispatched to FastAPI's threadpool; the handler does no CPU-heavy
+    work, so the thread hop is pure overhead.
+    """
+
+    with TELEMETRY_INGEST_SECONDS.time():
+        telemetry_rows = _to_rows(event)
+        request_id = telemetry_rows[0]["id"]
 
-    # For now, just log to console
-    print("Received telemetry:")
-    print(telemetry_record)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("telemetry %s", request_id)
 
-    # Later:
-    # with get_session() as session:
-    #     session.add(LLMRequest(**telemetry_record))
-    #     session.commit()
+        # Persisted asynchronously by flush_worker
+        await telemetry_queue.put(telemetry_rows)
+        TELEMETRY_INGESTED.labels(event.app_id).inc()
 
     return TelemetryResponse(
         request_id=request_id,
         status="logged"
     )
+
+
+@app.post(
+    "/log/batch",
+    response_model=TelemetryBatchResponse,
+    # The body is read by hand below, so FastAPI can't infer its schema
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/TelemetryEvent"},
+                    }
+                }
+            },
+        }
+    },
+)
+async def log_telemetry_batch(request: Request) -> TelemetryBatchResponse:
+    """
+    Ingests a JSON array of telemetry events in one request.
+
+    The body is parsed and validated in one TypeAdapter call rather than
+    once per event, and all records go onto the same write queue as /log.
+    """
+
+    with TELEMETRY_INGEST_SECONDS.time():
+        try:
+            events = TELEMETRY_BATCH_ADAPTER.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
+
+        request_ids = []
+        for event in events:
+            telemetry_rows = _to_rows(event)
+            request_ids.append(telemetry_rows[0]["id"])
+            await telemetry_queue.put(telemetry_rows)
+            TELEMETRY_INGESTED.labels(event.app_id).inc()
+
+    return TelemetryBatchResponse(
+        request_ids=request_ids,
+        status="logged"
+    )
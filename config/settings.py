@@ -2,76 +2,217 @@
 Configuration management for the AI Observability Platform.
 
 This module centralizes all configuration settings using environment variables
-with sensible defaults for local development.
+with sensible defaults for local development. Use get_settings() to read them.
 """
 
-import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
 # Project root directory
 PROJECT_ROOT = Path(__file__).parent.parent
 
-# Database Configuration
-DATABASE_URL = os.getenv(
-    "DATABASE_URL", 
-    f"sqlite:///{PROJECT_ROOT}/data/observability.db"
-)
-
-# Ensure data directory exists
+# Default location for the SQLite database and log files. Created on demand
+# by make_engine(), not at import time.
 DATA_DIR = PROJECT_ROOT / "data"
-DATA_DIR.mkdir(exist_ok=True)
-
-# API Configuration
-API_HOST = os.getenv("API_HOST", "0.0.0.0")
-API_PORT = int(os.getenv("API_PORT", "8000"))
-API_RELOAD = os.getenv("API_RELOAD", "true").lower() == "true"
 
-# Ollama Configuration
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b")
-OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "120"))  # seconds
-
-# Embedding Configuration
-EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
 EMBEDDING_DIMENSION = 384  # For all-MiniLM-L6-v2
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-# Evaluation Configuration
-EVALUATION_BATCH_SIZE = int(os.getenv("EVALUATION_BATCH_SIZE", "10"))
-EVALUATION_LOOKBACK_HOURS = int(os.getenv("EVALUATION_LOOKBACK_HOURS", "1"))
-
-# Alert Thresholds
-ALERT_HALLUCINATION_THRESHOLD = float(os.getenv("ALERT_HALLUCINATION_THRESHOLD", "0.6"))
-ALERT_DRIFT_THRESHOLD = float(os.getenv("ALERT_DRIFT_THRESHOLD", "0.3"))
-ALERT_LATENCY_THRESHOLD_MS = float(os.getenv("ALERT_LATENCY_THRESHOLD_MS", "5000"))
-
-# Drift Detection Configuration
-DRIFT_BASELINE_WINDOW_DAYS = int(os.getenv("DRIFT_BASELINE_WINDOW_DAYS", "7"))
-DRIFT_RECENT_WINDOW_HOURS = int(os.getenv("DRIFT_RECENT_WINDOW_HOURS", "24"))
-DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "10"))
-
-# Dashboard Configuration
-DASHBOARD_PORT = int(os.getenv("DASHBOARD_PORT", "8501"))
-DASHBOARD_REFRESH_INTERVAL = int(os.getenv("DASHBOARD_REFRESH_INTERVAL", "60"))  # seconds
 
-# Logging Configuration
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+class Settings(BaseSettings):
+    """
+    All environment-driven settings, parsed and type-checked once.
+
+    Every field can be overridden by the environment variable of the same
+    name in upper case (e.g. API_PORT), or from a .env file.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Database Configuration
+    database_url: str = f"sqlite:///{DATA_DIR}/observability.db"
+    # Columnar replica used for analytics reads (see database/analytics.py)
+    duckdb_path: str = str(DATA_DIR / "observability.duckdb")
+
+    # API Configuration
+    api_host: str = "0.0.0.0"
+    api_port: int = 8000
+    api_reload: bool = True
+
+    # Connection Pool Configuration
+    pool_size: int = 10
+    pool_max_overflow: int = 20
+    pool_timeout: int = 30  # seconds
+    pool_recycle: int = 1800  # seconds
+
+    # Ingestion Configuration
+    # Telemetry is buffered in memory and written in batches; a batch is
+    # flushed once it reaches ingest_batch_size rows or
+    # ingest_flush_interval_ms elapses.
+    ingest_queue_size: int = 10000
+    ingest_batch_size: int = 50
+    ingest_flush_interval_ms: int = 200
+    # How often the API checkpoints the SQLite WAL in the background
+    # (0 leaves it entirely to wal_autocheckpoint)
+    wal_checkpoint_interval_s: float = 5.0
+    # How long a SQLite writer waits for another process's write lock before
+    # failing with "database is locked". Several workers' batch commits may
+    # queue up ahead of it, so this is deliberately generous.
+    sqlite_busy_timeout_ms: int = 30000
+
+    # Ollama Configuration
+    ollama_base_url: str = "http://localhost:11434"
+    ollama_model: str = "llama3:8b"
+    ollama_timeout: int = 120  # seconds
+
+    # Embedding Configuration
+    embedding_model: str = "all-MiniLM-L6-v2"
+
+    # Evaluation Configuration
+    evaluation_batch_size: int = 10
+    evaluation_lookback_hours: int = 1
+
+    # Alert Thresholds
+    alert_hallucination_threshold: float = 0.6
+    alert_drift_threshold: float = 0.3
+    alert_latency_threshold_ms: float = 5000
+
+    # Drift Detection Configuration
+    drift_baseline_window_days: int = 7
+    drift_recent_window_hours: int = 24
+    drift_min_samples: int = 10
+
+    # Dashboard Configuration
+    dashboard_port: int = 8501
+    dashboard_refresh_interval: int = 60  # seconds
+
+    # Logging Configuration
+    log_level: str = "INFO"
+    log_file: str = str(DATA_DIR / "api.log")
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide Settings, parsing the environment on first use."""
+    return Settings()
 
 
 def get_database_path() -> Path:
     """Get the absolute path to the SQLite database file."""
-    if DATABASE_URL.startswith("sqlite:///"):
-        db_path = DATABASE_URL.replace("sqlite:///", "")
+    database_url = get_settings().database_url
+    if database_url.startswith("sqlite:///"):
+        db_path = database_url.replace("sqlite:///", "")
         return Path(db_path)
-    raise ValueError(f"Unsupported database URL: {DATABASE_URL}")
-
-
-def validate_ollama_available() -> bool:
+    raise ValueError(f"Unsupported database URL: {database_url}")
+
+
+# SQLite tuning applied to every new connection. WAL turns commits into
+# sequential appends and lets readers run alongside the writer; with WAL,
+# synchronous=NORMAL is still crash-safe (only the last commits can be lost
+# on power failure).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "mmap_size": 1073741824,  # 1 GiB; reads become memory loads, not pread()
+    "cache_size": -64000,  # negative = KiB, so ~64 MB
+    "wal_autocheckpoint": 1000,  # pages
+    "foreign_keys": "ON",  # off by default in SQLite; needed for ON DELETE CASCADE
+}
+
+
+def make_engine():
+    """
+    Create the SQLAlchemy engine for the configured database_url.
+
+    Connections come from a QueuePool sized by the pool_* settings, with
+    pre-ping and LIFO reuse so idle connections get recycled instead of
+    reopened. For SQLite, the database directory is created if missing,
+    every new connection gets SQLITE_PRAGMAS plus sqlite_busy_timeout_ms
+    applied, and PRAGMA optimize
+    runs as each connection is closed (e.g. on engine.dispose()).
+    """
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import QueuePool
+
+    settings = get_settings()
+    pool_options = {
+        "poolclass": QueuePool,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.pool_max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": True,
+        "pool_use_lifo": True,
+    }
+
+    if not settings.database_url.startswith("sqlite"):
+        return create_engine(settings.database_url, **pool_options)
+
+    db_dir = get_database_path().parent
+    if not db_dir.is_dir():
+        db_dir.mkdir(parents=True, exist_ok=True)
+
+    engine = create_engine(
+        settings.database_url,
+        # Connections are handed between the event loop and worker threads
+        connect_args={"check_same_thread": False},
+        **pool_options,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        pragmas = {**SQLITE_PRAGMAS, "busy_timeout": settings.sqlite_busy_timeout_ms}
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "close")
+    def _optimize_on_close(dbapi_connection, connection_record):
+        # Lets SQLite refresh planner statistics for the indexes it used
+        dbapi_connection.execute("PRAGMA optimize")
+
+    return engine
+
+
+# Shared Ollama client, created on first use. Reusing it keeps connections
+# alive between calls instead of reconnecting on every request.
+_ollama_client = None
+
+
+def get_ollama_client():
+    """Return the process-wide httpx.AsyncClient for the Ollama API."""
+    global _ollama_client
+    if _ollama_client is None:
+        import httpx
+
+        settings = get_settings()
+        _ollama_client = httpx.AsyncClient(
+            base_url=settings.ollama_base_url,
+            timeout=settings.ollama_timeout,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+    return _ollama_client
+
+
+async def close_ollama_client() -> None:
+    """Close the shared Ollama client, if one was created."""
+    global _ollama_client
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+        _ollama_client = None
+
+
+async def validate_ollama_available() -> bool:
     """Check if Ollama is available and responding."""
-    import httpx
     try:
-        response = httpx.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+        response = await get_ollama_client().get("/api/tags", timeout=5)
         return response.status_code == 200
     except Exception:
         return False
@@ -80,25 +221,28 @@ def validate_ollama_available() -> bool:
 # Configuration summary for debugging
 def print_config():
     """Print current configuration (useful for debugging)."""
+    settings = get_settings()
     print("=" * 60)
     print("AI Observability Platform - Configuration")
     print("=" * 60)
-    print(f"Database URL: {DATABASE_URL}")
-    print(f"API: {API_HOST}:{API_PORT}")
-    print(f"Ollama: {OLLAMA_BASE_URL} (Model: {OLLAMA_MODEL})")
-    print(f"Embedding Model: {EMBEDDING_MODEL}")
+    print(f"Database URL: {settings.database_url}")
+    print(f"API: {settings.api_host}:{settings.api_port}")
+    print(f"Ollama: {settings.ollama_base_url} (Model: {settings.ollama_model})")
+    print(f"Embedding Model: {settings.embedding_model}")
     print(f"Alert Thresholds:")
-    print(f"  - Hallucination: {ALERT_HALLUCINATION_THRESHOLD}")
-    print(f"  - Drift: {ALERT_DRIFT_THRESHOLD}")
-    print(f"  - Latency: {ALERT_LATENCY_THRESHOLD_MS}ms")
+    print(f"  - Hallucination: {settings.alert_hallucination_threshold}")
+    print(f"  - Drift: {settings.alert_drift_threshold}")
+    print(f"  - Latency: {settings.alert_latency_threshold_ms}ms")
     print("=" * 60)
 
 
 if __name__ == "__main__":
+    import asyncio
+
     print_config()
     
     # Validate Ollama
-    if validate_ollama_available():
+    if asyncio.run(validate_ollama_available()):
         print("✅ Ollama is available")
     else:
         print("❌ Ollama is not available - please start Ollama service")
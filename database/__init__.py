@@ -3,7 +3,8 @@ Database package for AI Observability Platform.
 
 This package contains:
 - models.py: SQLAlchemy ORM models
-- db.py: Database session management (coming in Day 4)
+- db.py: Database engine and session management
+- analytics.py: DuckDB replica for analytics queries
 """
 
 __version__ = "0.1.0"
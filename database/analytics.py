@@ -0,0 +1,233 @@
+"""
+DuckDB analytics replica for AI Observability Platform.
+
+SQLite stays the write path for ingestion. Dashboards and the drift and
+alert jobs run aggregations over llm_requests, and a columnar engine only
+reads the columns a query touches, so those reads go to a DuckDB copy of
+the metric columns instead. Prompt/response text and metadata are not
+replicated.
+
+The copy is refreshed incrementally by sync_to_duckdb(), which copies the
+rows committed to SQLite since the previous sync (tracked by rowid). It can
+be run on a schedule:
+
+    python -m database.analytics
+
+Concurrency: a DuckDB file can be opened by one read-write process or by
+any number of read-only ones, never both. The replica is therefore kept in
+two files, <duckdb_path>.a and <duckdb_path>.b, and duckdb_path is a
+symlink to the one readers should open. Each sync brings the other file up
+to date, which costs only the rows committed since that file was last
+synced, and then atomically repoints the symlink at it. Readers that
+already have the old file open keep their snapshot, and new connections
+see the new one. Readers see data as of the last completed sync. Until
+the first sync, they get an empty in-memory table.
+
+A file is copied in full only when it can't be synced in place: on the
+first sync of each file, when upgrading from a single-file replica, or
+when a reader from before the previous swap still has the file open. The
+copy then takes time and disk space proportional to the whole replica.
+This relies on POSIX symlink and rename semantics and is not supported
+on Windows.
+
+Usage Example:
+    from database.analytics import get_analytics_connection
+
+    with get_analytics_connection() as conn:
+        conn.execute(
+            "SELECT app_id, avg(latency_ms) FROM llm_requests GROUP BY app_id"
+        ).fetchall()
+"""
+
+import os
+import shutil
+from typing import Optional
+
+import duckdb
+import pandas as pd
+from sqlalchemy import Connection, literal_column, select
+
+from config.settings import get_settings
+from database.db import engine
+from database.models import LLMRequest
+
+REPLICATED_COLUMNS = [
+    LLMRequest.id,
+    LLMRequest.app_id,
+    LLMRequest.model_name,
+    LLMRequest.latency_ms,
+    LLMRequest.token_count,
+    LLMRequest.created_at_ms,
+]
+
+DUCKDB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_requests (
+    id VARCHAR PRIMARY KEY,
+    app_id VARCHAR NOT NULL,
+    model_name VARCHAR NOT NULL,
+    latency_ms DOUBLE NOT NULL,
+    token_count INTEGER,
+    created_at_ms BIGINT NOT NULL
+)
+"""
+
+# Tracks how far the replica has been synced: the SQLite rowid of the last
+# copied row, and that row's id to detect rowids that have since changed.
+SYNC_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    last_rowid BIGINT NOT NULL,
+    last_id VARCHAR NOT NULL
+)
+"""
+
+# llm_requests has a text primary key, so SQLite gives each row an implicit
+# rowid of max(rowid) + 1 when it is inserted. SQLite allows one writer at a
+# time, so rowids increase in commit order. Request ids do not: a row can
+# wait in the ingest queue and behind busy_timeout retries for an unbounded
+# time between getting its id and being committed.
+ROWID = literal_column("llm_requests.rowid")
+
+SYNC_CHUNK_ROWS = 50_000
+
+
+def get_analytics_connection() -> duckdb.DuckDBPyConnection:
+    """
+    Open the DuckDB replica read-only.
+
+    Before the first sync there is no file to open, so an in-memory
+    database with an empty llm_requests table is returned instead.
+    """
+    duckdb_path = get_settings().duckdb_path
+    if not os.path.exists(duckdb_path):
+        conn = duckdb.connect(":memory:")
+        conn.execute(DUCKDB_SCHEMA)
+        return conn
+    # Open the file the symlink points at, so DuckDB looks for its WAL
+    # next to that file
+    return duckdb.connect(os.path.realpath(duckdb_path), read_only=True)
+
+
+def _resume_after(duck: duckdb.DuckDBPyConnection, conn: Connection) -> int:
+    """
+    Return the SQLite rowid after which rows still need to be copied.
+
+    Rowids are only stable while rows are not deleted from the end of the
+    table and VACUUM does not renumber them. If the last copied rowid no
+    longer holds the last copied id, everything is scanned again; rows
+    already in the replica are skipped.
+    """
+    state = duck.execute("SELECT last_rowid, last_id FROM sync_state").fetchone()
+    if state is None:
+        return 0
+    last_rowid, last_id = state
+    current_id = conn.execute(
+        select(LLMRequest.id).where(ROWID == last_rowid)
+    ).scalar_one_or_none()
+    return last_rowid if current_id == last_id else 0
+
+
+def _sync_into(duck: duckdb.DuckDBPyConnection) -> int:
+    """Copy new llm_requests rows from SQLite into an open DuckDB connection."""
+    column_names = [column.key for column in REPLICATED_COLUMNS]
+    select_list = ", ".join(column_names)
+    rows_read = 0
+    last_row = None
+
+    duck.execute(DUCKDB_SCHEMA)
+    duck.execute(SYNC_STATE_SCHEMA)
+
+    with engine.connect() as conn:
+        query = (
+            select(ROWID, *REPLICATED_COLUMNS)
+            .where(ROWID > _resume_after(duck, conn))
+            .order_by(ROWID)
+        )
+        result = conn.execution_options(yield_per=SYNC_CHUNK_ROWS).execute(query)
+        for rows in result.partitions():
+            batch = pd.DataFrame.from_records(rows, columns=["rowid", *column_names])
+            duck.register("batch", batch)
+            duck.execute(f"INSERT OR IGNORE INTO llm_requests SELECT {select_list} FROM batch")
+            duck.unregister("batch")
+            rows_read += len(batch)
+            last_row = rows[-1]
+
+    if last_row is not None:
+        duck.execute("DELETE FROM sync_state")
+        duck.execute("INSERT INTO sync_state VALUES (?, ?)", [last_row[0], last_row[1]])
+
+    return rows_read
+
+
+def _sync_copy(source: Optional[str], target: str) -> int:
+    """
+    Sync into a fresh copy of source and move it into place as target.
+
+    The full file copy is only needed when target can't be synced in
+    place: it doesn't exist yet, or a reader still has it open.
+    """
+    # Per-process name so overlapping cron runs don't share a temp file
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+
+    try:
+        if source is not None:
+            shutil.copyfile(source, tmp_path)
+        with duckdb.connect(tmp_path) as duck:
+            rows_read = _sync_into(duck)
+        os.replace(tmp_path, target)
+    finally:
+        for leftover in (tmp_path, f"{tmp_path}.wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return rows_read
+
+
+def _point_at(duckdb_path: str, target: str) -> None:
+    """Atomically repoint the duckdb_path symlink at target."""
+    tmp_link = f"{duckdb_path}.{os.getpid()}.link"
+    os.symlink(os.path.basename(target), tmp_link)
+    try:
+        os.replace(tmp_link, duckdb_path)
+    except OSError:
+        os.remove(tmp_link)
+        raise
+
+
+def sync_to_duckdb() -> int:
+    """
+    Copy llm_requests rows not yet in the DuckDB replica.
+
+    Syncs whichever of the two replica files readers are not using and
+    then points readers at it, so it never conflicts with them (see the
+    module docstring).
+
+    Returns:
+        int: Number of rows read from SQLite
+    """
+    duckdb_path = get_settings().duckdb_path
+    replicas = (f"{duckdb_path}.a", f"{duckdb_path}.b")
+    active = os.path.realpath(duckdb_path) if os.path.exists(duckdb_path) else None
+    target = replicas[1] if active == os.path.realpath(replicas[0]) else replicas[0]
+
+    if active is not None and not os.path.islink(duckdb_path):
+        # A single-file replica from before the A/B layout
+        rows_read = _sync_copy(active, target)
+    elif not os.path.exists(target):
+        rows_read = _sync_copy(active, target)
+    else:
+        try:
+            duck = duckdb.connect(target)
+        except (duckdb.IOException, duckdb.ConnectionException):
+            # A reader from before the previous swap still has it open
+            rows_read = _sync_copy(active, target)
+        else:
+            with duck:
+                rows_read = _sync_into(duck)
+
+    _point_at(duckdb_path, target)
+    return rows_read
+
+
+if __name__ == "__main__":
+    count = sync_to_duckdb()
+    print(f"✅ Synced {count} rows to {get_settings().duckdb_path}")
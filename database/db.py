@@ -0,0 +1,108 @@
+"""
+Database session management for AI Observability Platform.
+
+This module owns the SQLAlchemy engine and session factory used by the
+API and batch jobs.
+
+Usage Example:
+    from database.db import get_session
+    from database.models import LLMRequest
+
+    with get_session() as session:
+        session.add(LLMRequest(...))
+        session.commit()
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from config.settings import get_database_path, get_settings, make_engine
+from database.models import Base
+
+engine = make_engine()
+
+# Incremented on every pool checkout; a checkout count that grows much
+# faster than the connect count means connections are being reused.
+_pool_counters = {"connects": 0, "checkouts": 0}
+
+
+@event.listens_for(engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    _pool_counters["connects"] += 1
+
+
+@event.listens_for(engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_counters["checkouts"] += 1
+
+
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+# Single-column indexes from older schemas, now covered by the composite
+# indexes on llm_requests (see database/models.py)
+OBSOLETE_INDEXES = ["ix_llm_requests_app_id", "ix_llm_requests_model_name"]
+
+
+def init_db() -> None:
+    """Create all tables that don't exist yet and drop obsolete indexes."""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index_name in OBSOLETE_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+
+
+def warm_page_cache() -> None:
+    """
+    Ask the OS to start reading the SQLite database file into the page cache.
+
+    Combined with mmap_size, the first dashboard queries after a restart
+    then hit memory instead of faulting pages in from disk. This is only a
+    hint: it returns immediately and does nothing on platforms without
+    posix_fadvise or for non-SQLite databases.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    if not get_settings().database_url.startswith("sqlite:///"):
+        return
+
+    try:
+        fd = os.open(get_database_path(), os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """Return connection pool counters and current occupancy."""
+    pool = engine.pool
+    return {
+        **_pool_counters,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        # QueuePool.overflow() counts up from -pool_size; only report
+        # connections actually opened beyond the pool
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+@contextmanager
+def get_session() -> Iterator[Session]:
+    """
+    Provide a session that is always closed afterwards.
+
+    Callers are responsible for committing; anything left uncommitted
+    is rolled back when the session closes.
+    """
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -6,41 +6,186 @@ This module defines the core data schema for storing LLM telemetry data.
 Design Principles:
 - Analytics-friendly: Optimized for time-series queries
 - Indexed: Fast lookups by app_id, model, and timestamp
-- Flexible: JSON metadata for extensibility
+- Flexible: JSON metadata for extensibility (stored as compact orjson bytes)
 - Type-safe: Proper column types and constraints
 
 Author: Tanush Banchhod
 Project: AI Observability Platform
 """
 
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Index
-from sqlalchemy.orm import declarative_base
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import orjson
+import zstandard
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, LargeBinary, String, Float, Index
+from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.types import TypeDecorator
 
 # Create base class for all models
 # All our table classes will inherit from this
 Base = declarative_base()
 
 
+class ORJSONBlob(TypeDecorator):
+    """
+    JSON value stored as orjson-encoded bytes.
+
+    SQLAlchemy's JSON type goes through the stdlib json module and SQLite
+    keeps it as TEXT; orjson encodes and decodes several times faster and
+    the BLOB is stored as-is. Values round-trip as plain dicts/lists.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return orjson.dumps(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        if value is None:
+            return None
+        return orjson.loads(value)
+
+
+# zstandard compressors/decompressors are reusable but must not be shared
+# between threads, and batches are written from worker threads, so each
+# thread gets its own pair.
+_zstd_local = threading.local()
+
+
+def _zstd() -> threading.local:
+    if not hasattr(_zstd_local, "compressor"):
+        _zstd_local.compressor = zstandard.ZstdCompressor(level=3)
+        _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_local
+
+
+class ZstdText(TypeDecorator):
+    """
+    Text stored as a zstd-compressed UTF-8 BLOB.
+
+    Prompts and responses are highly redundant text, so compressing them
+    before insert cuts the bytes written to the WAL and the database file.
+    Values round-trip as plain str.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return _zstd().compressor.compress(value.encode("utf-8"))
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return _zstd().decompressor.decompress(value).decode("utf-8")
+
+
+# ============================================
+# ID GENERATION
+# ============================================
+# Request ids are UUIDv7: a 48-bit millisecond timestamp followed by random
+# bits, so ids sort by creation time and new rows append to the end of the
+# primary key B-tree instead of landing at random positions. They are stored
+# as 32-char hex (no dashes).
+
+_RANDOM_POOL_SIZE = 1024
+_random_pool = b""
+_random_offset = _RANDOM_POOL_SIZE
+_random_lock = threading.Lock()
+
+
+def _random_bytes(n: int) -> bytes:
+    """Take n bytes from a pre-filled urandom buffer, refilling it lazily."""
+    global _random_pool, _random_offset
+    with _random_lock:
+        if _random_offset + n > len(_random_pool):
+            _random_pool = os.urandom(_RANDOM_POOL_SIZE)
+            _random_offset = 0
+        start = _random_offset
+        _random_offset += n
+        return _random_pool[start:_random_offset]
+
+
+def now_ms() -> int:
+    """Current time as integer milliseconds since the Unix epoch."""
+    return time.time_ns() // 1_000_000
+
+
+# Fallback generator state. rand_a holds a counter within each millisecond
+# (RFC 9562, section 6.2, method 1) so ids from this process are strictly
+# increasing even when many are generated in the same millisecond.
+_RAND_A_MAX = 0xFFF
+_last_id_ms = -1
+_id_counter = 0
+_id_lock = threading.Lock()
+
+
+def generate_request_id() -> str:
+    """Return a new UUIDv7 as a 32-char hex string."""
+    global _last_id_ms, _id_counter
+    if hasattr(uuid, "uuid7"):  # Python 3.14+
+        return uuid.uuid7().hex
+
+    with _id_lock:
+        timestamp_ms = now_ms()
+        if timestamp_ms > _last_id_ms:
+            # Random start with the top bit clear leaves room to count up
+            _id_counter = int.from_bytes(_random_bytes(2), "big") & (_RAND_A_MAX >> 1)
+        else:
+            # Same millisecond, or the clock stepped back: keep counting
+            # from the last id, borrowing the next millisecond on overflow
+            timestamp_ms = _last_id_ms
+            _id_counter += 1
+            if _id_counter > _RAND_A_MAX:
+                timestamp_ms += 1
+                _id_counter = 0
+        _last_id_ms = timestamp_ms
+        counter = _id_counter
+
+    rand_b = int.from_bytes(_random_bytes(8), "big")  # 64 bits, 62 used
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76  # version
+        | counter << 64  # rand_a: 12-bit counter
+        | 0b10 << 62  # variant
+        | rand_b & 0x3FFF_FFFF_FFFF_FFFF  # rand_b: 62 bits
+    )
+    return f"{value:032x}"
+
+
 class LLMRequest(Base):
     """
     Stores telemetry data from LLM applications.
     
     This is the main "fact table" for analytics. Each row represents
-    one LLM inference call with its input, output, and performance metrics.
+    one LLM inference call with its performance metrics. The prompt and
+    response text live in LLMRequestContent, so scans over this table
+    only read small, fixed-size rows.
     
     Usage Example:
-        from database.models import LLMRequest
+        from database.models import LLMRequest, LLMRequestContent
         from database.db import SessionLocal
         
         # Create a new request record
         request = LLMRequest(
             app_id="my_chatbot",
             model_name="gpt-3.5-turbo",
-            prompt="What is AI?",
-            response="AI stands for Artificial Intelligence...",
             latency_ms=342.5,
-            request_metadata={"user_id": "user_123", "session": "abc"}
+            request_metadata={"user_id": "user_123", "session": "abc"},
+            content=LLMRequestContent(
+                prompt="What is AI?",
+                response="AI stands for Artificial Intelligence...",
+            ),
         )
         
         # Save to database
@@ -56,9 +201,9 @@ class LLMRequest(Base):
     # PRIMARY KEY
     # ============================================
     id = Column(
-        Integer, 
-        primary_key=True, 
-        autoincrement=True,
+        String(32),
+        primary_key=True,
+        default=generate_request_id,  # API pre-generates this
         comment="Unique identifier for each LLM request"
     )
     
@@ -68,32 +213,17 @@ class LLMRequest(Base):
     app_id = Column(
         String(255),
         nullable=False,
-        index=True,  # Index for fast filtering by app
+        # Filtering by app uses idx_app_created_latency (see below)
         comment="Application identifier (e.g., 'chatbot', 'code_assistant')"
     )
     
     model_name = Column(
         String(255),
         nullable=False,
-        index=True,  # Index for fast filtering by model
+        # Filtering by model uses idx_model_created (see below)
         comment="LLM model used (e.g., 'gpt-4', 'claude-2', 'llama3:8b')"
     )
     
-    # ============================================
-    # REQUEST CONTENT
-    # ============================================
-    prompt = Column(
-        Text,
-        nullable=False,
-        comment="User input/prompt sent to the LLM"
-    )
-    
-    response = Column(
-        Text,
-        nullable=False,
-        comment="LLM generated response/completion"
-    )
-    
     # ============================================
     # PERFORMANCE METRICS
     # ============================================
@@ -103,22 +233,32 @@ class LLMRequest(Base):
         comment="Response time in milliseconds (end-to-end)"
     )
     
+    token_count = Column(
+        Integer,
+        nullable=True,
+        comment="Total tokens consumed by the call, if reported"
+    )
+    
     # ============================================
     # TIMESTAMPS
     # ============================================
-    created_at = Column(
-        DateTime,
+    # Stored as epoch milliseconds rather than DateTime: no datetime objects
+    # are built on the insert path and SQLite compares plain integers.
+    created_at_ms = Column(
+        BigInteger,
         nullable=False,
-        default=datetime.utcnow,  # Auto-populate with current time
-        index=True,  # Critical for time-series queries
-        comment="Timestamp when request was received by observability platform"
+        default=now_ms,  # Auto-populate with current time
+        # Time-series lookups use idx_created_latency (see below)
+        comment="Epoch milliseconds when request was received by observability platform"
     )
     
     # ============================================
     # FLEXIBLE METADATA
     # ============================================
+    # Named request_metadata because `metadata` is reserved on declarative
+    # models (it holds the MetaData registry)
     request_metadata = Column(
-        JSON,
+        ORJSONBlob,
         nullable=True,
         comment="Additional context stored as JSON (e.g., user_id, session_id, tags)"
     )
@@ -129,11 +269,40 @@ class LLMRequest(Base):
     # These speed up common query patterns:
     # 1. "Show me all requests for app X over time"
     # 2. "Show me all requests for model Y over time"
+    # 3. "Show me latency over a time window" (drift, dashboards)
+    # The latency indexes are covering: latency alert and aggregate queries
+    # are answered from the index alone without reading the table rows.
+    # There are no single-column indexes on app_id, model_name or
+    # created_at_ms: each is a leading prefix of one of these, so it would
+    # only add write cost on every insert.
     __table_args__ = (
-        Index("idx_app_created", "app_id", "created_at"),
-        Index("idx_model_created", "model_name", "created_at"),
+        Index("idx_app_created_latency", "app_id", "created_at_ms", "latency_ms"),
+        Index("idx_model_created", "model_name", "created_at_ms"),
+        Index("idx_created_latency", "created_at_ms", "latency_ms"),
     )
     
+    # ============================================
+    # REQUEST CONTENT
+    # ============================================
+    # Never loaded implicitly; use options(joinedload(LLMRequest.content))
+    # when the text is actually needed. Because it is never loaded, the ORM
+    # can't cascade deletes to it; passive_deletes leaves that to the
+    # database's ON DELETE CASCADE.
+    content = relationship(
+        "LLMRequestContent",
+        lazy="noload",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    
+    @property
+    def created_at(self) -> Optional[datetime]:
+        """created_at_ms as a UTC datetime, built only when read."""
+        if self.created_at_ms is None:
+            return None
+        return datetime.fromtimestamp(self.created_at_ms / 1000, tz=timezone.utc)
+    
     def __repr__(self):
         """String representation for debugging."""
         return (
@@ -151,6 +320,8 @@ class LLMRequest(Base):
         
         Useful for API responses and debugging.
         
+        prompt/response are None unless content was loaded.
+        
         Returns:
             dict: Dictionary representation of the request
         """
@@ -158,14 +329,50 @@ class LLMRequest(Base):
             "id": self.id,
             "app_id": self.app_id,
             "model_name": self.model_name,
-            "prompt": self.prompt,
-            "response": self.response,
+            "prompt": self.content.prompt if self.content else None,
+            "response": self.content.response if self.content else None,
             "latency_ms": self.latency_ms,
+            "token_count": self.token_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "metadata": self.request_metadata  # Expose as 'metadata' in API
         }
 
 
+class LLMRequestContent(Base):
+    """
+    Prompt and response text for an LLMRequest, one row per request.
+    
+    Split out of llm_requests so that analytics over the metric columns
+    don't page through large text values they never use. Both columns are
+    stored zstd-compressed (see ZstdText).
+    """
+    
+    __tablename__ = "llm_request_contents"
+    
+    request_id = Column(
+        String(32),
+        ForeignKey("llm_requests.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="The LLMRequest this content belongs to"
+    )
+    
+    prompt = Column(
+        ZstdText,
+        nullable=False,
+        comment="User input/prompt sent to the LLM"
+    )
+    
+    response = Column(
+        ZstdText,
+        nullable=False,
+        comment="LLM generated response/completion"
+    )
+    
+    def __repr__(self):
+        """String representation for debugging."""
+        return f"<LLMRequestContent(request_id={self.request_id})>"
+
+
 # ============================================
 # UTILITY FUNCTIONS
 # ============================================
@@ -182,6 +389,12 @@ def get_model_info():
             "table": LLMRequest.__tablename__,
             "columns": len(LLMRequest.__table__.columns),
             "indexes": len(LLMRequest.__table__.indexes)
+        },
+        "llm_request_contents": {
+            "class": LLMRequestContent,
+            "table": LLMRequestContent.__tablename__,
+            "columns": len(LLMRequestContent.__table__.columns),
+            "indexes": len(LLMRequestContent.__table__.indexes)
         }
     }
     return models
@@ -202,7 +415,6 @@ def validate_schema():
     print(f"✅ Model: {LLMRequest.__name__}")
     print(f"   Table name: {LLMRequest.__tablename__}")
     print(f"   Total columns: {len(LLMRequest.__table__.columns)}")
-    print(f"   Indexed columns: app_id, model_name, created_at")
     print(f"   Composite indexes: {len(LLMRequest.__table__.indexes)}")
     
     # List all columns
@@ -210,8 +422,18 @@ def validate_schema():
     for column in LLMRequest.__table__.columns:
         col_type = str(column.type)
         nullable = "NULL" if column.nullable else "NOT NULL"
-        indexed = "INDEXED" if column.index else ""
-        print(f"     - {column.name:15s} {col_type:20s} {nullable:10s} {indexed}")
+        print(f"     - {column.name:15s} {col_type:20s} {nullable}")
+
+    # List all indexes
+    print(f"\n   Indexes:")
+    for index in sorted(LLMRequest.__table__.indexes, key=lambda i: i.name):
+        columns = ", ".join(column.name for column in index.columns)
+        print(f"     - {index.name:25s} ({columns})")
+    
+    # Check LLMRequestContent model
+    print(f"\n✅ Model: {LLMRequestContent.__name__}")
+    print(f"   Table name: {LLMRequestContent.__tablename__}")
+    print(f"   Total columns: {len(LLMRequestContent.__table__.columns)}")
     
     print("\n" + "=" * 70)
     print("✅ Schema validation passed!")
@@ -243,15 +465,17 @@ if __name__ == "__main__":
     sample_request = LLMRequest(
         app_id="demo_chatbot",
         model_name="gpt-3.5-turbo",
-        prompt="What is the capital of France?",
-        response="Paris is the capital of France.",
         latency_ms=342.5,
-        created_at=datetime.utcnow(),
+        created_at_ms=now_ms(),
         request_metadata={
             "user_id": "user_123",
             "session": "session_abc",
             "source": "web_interface"
-        }
+        },
+        content=LLMRequestContent(
+            prompt="What is the capital of France?",
+            response="Paris is the capital of France.",
+        )
     )
     
     print(f"Created instance: {sample_request}")
@@ -0,0 +1,24 @@
+"""
+Create the AI Observability Platform database schema.
+
+Run once before starting the API (and again after adding models):
+
+    python scripts/init_db.py
+
+Existing tables are left untouched; indexes the models no longer
+declare are dropped.
+"""
+
+import sys
+from pathlib import Path
+
+# Allow running as a plain script from anywhere
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import get_settings  # noqa: E402
+from database.db import init_db  # noqa: E402
+
+
+if __name__ == "__main__":
+    init_db()
+    print(f"✅ Database initialized: {get_settings().database_url}")
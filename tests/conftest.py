@@ -0,0 +1,32 @@
+"""
+Shared test setup.
+
+Settings are read once per process and the engine is created on import of
+database.db, so the environment must point at a scratch directory before
+any project module is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_TMP_DIR = Path(tempfile.mkdtemp(prefix="observability-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR / 'observability.db'}"
+os.environ["DUCKDB_PATH"] = str(_TMP_DIR / "observability.duckdb")
+os.environ["LOG_FILE"] = str(_TMP_DIR / "api.log")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+
+from database.db import engine, init_db  # noqa: E402
+from database.models import Base  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_schema():
+    """Give every test empty tables."""
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    yield
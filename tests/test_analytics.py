@@ -0,0 +1,159 @@
+"""Tests for the DuckDB replica in database/analytics.py."""
+
+import os
+
+import duckdb
+import pytest
+
+from config.settings import get_settings
+from database import analytics
+from database.db import get_session
+from database.models import LLMRequest
+
+
+@pytest.fixture(autouse=True)
+def no_replica():
+    """Start every test without replica files."""
+    duckdb_path = get_settings().duckdb_path
+    for path in (duckdb_path, f"{duckdb_path}.a", f"{duckdb_path}.b"):
+        if os.path.lexists(path):
+            os.remove(path)
+    yield
+
+
+def _request_id(ms: int, suffix: int = 0) -> str:
+    """A UUIDv7-shaped hex id for the given millisecond."""
+    return f"{ms:012x}7{suffix:019x}"
+
+
+def _add_requests(*request_ids: str) -> None:
+    with get_session() as session:
+        for request_id in request_ids:
+            session.add(LLMRequest(
+                id=request_id,
+                app_id="test_app",
+                model_name="test_model",
+                latency_ms=10.0,
+                created_at_ms=int(request_id[:12], 16),
+            ))
+        session.commit()
+
+
+def _replica_ids() -> list:
+    with analytics.get_analytics_connection() as conn:
+        rows = conn.execute("SELECT id FROM llm_requests ORDER BY id").fetchall()
+    return [row[0] for row in rows]
+
+
+def test_read_before_first_sync_returns_empty_table():
+    assert _replica_ids() == []
+
+
+def test_sync_copies_only_rows_committed_since_last_sync():
+    base_ms = 1_800_000_000_000
+    first = _request_id(base_ms)
+    _add_requests(first)
+    assert analytics.sync_to_duckdb() == 1
+
+    second = _request_id(base_ms + 1)
+    _add_requests(second)
+
+    assert analytics.sync_to_duckdb() == 1
+    assert _replica_ids() == [first, second]
+
+
+def test_sync_picks_up_rows_committed_long_after_their_id():
+    base_ms = 1_800_000_000_000
+    newest = _request_id(base_ms)
+    _add_requests(newest)
+    analytics.sync_to_duckdb()
+
+    # Stamped an hour before the newest replicated id, but committed later
+    late = _request_id(base_ms - 3_600_000)
+    _add_requests(late)
+    analytics.sync_to_duckdb()
+
+    assert _replica_ids() == [late, newest]
+
+
+def test_sync_rescans_when_last_synced_rowid_is_reused():
+    base_ms = 1_800_000_000_000
+    kept, deleted = _request_id(base_ms), _request_id(base_ms + 1)
+    _add_requests(kept, deleted)
+    analytics.sync_to_duckdb()
+
+    # Deleting the last row lets SQLite hand its rowid to the next insert
+    with get_session() as session:
+        session.delete(session.get(LLMRequest, deleted))
+        session.commit()
+    reused = _request_id(base_ms + 2)
+    _add_requests(reused)
+    analytics.sync_to_duckdb()
+
+    assert reused in _replica_ids()
+
+
+def test_sync_succeeds_while_reader_is_open():
+    _add_requests(_request_id(1_800_000_000_000))
+    analytics.sync_to_duckdb()
+
+    with analytics.get_analytics_connection() as reader:
+        _add_requests(_request_id(1_800_000_000_001))
+        analytics.sync_to_duckdb()
+        # The open reader keeps its snapshot
+        assert reader.execute("SELECT count(*) FROM llm_requests").fetchone()[0] == 1
+
+    assert len(_replica_ids()) == 2
+    leftovers = [
+        name for name in os.listdir(os.path.dirname(get_settings().duckdb_path))
+        if name.endswith((".tmp", ".tmp.wal", ".link"))
+    ]
+    assert leftovers == []
+
+
+def test_syncs_alternate_between_two_files():
+    duckdb_path = get_settings().duckdb_path
+    request_ids = []
+    targets = []
+    for ms in range(3):
+        request_ids.append(_request_id(1_800_000_000_000 + ms))
+        _add_requests(request_ids[-1])
+        analytics.sync_to_duckdb()
+        targets.append(os.readlink(duckdb_path))
+        assert _replica_ids() == request_ids
+
+    assert targets[0] == targets[2] != targets[1]
+
+
+def test_sync_copies_file_still_held_by_old_reader():
+    _add_requests(_request_id(1_800_000_000_000))
+    analytics.sync_to_duckdb()
+
+    with analytics.get_analytics_connection() as reader:
+        _add_requests(_request_id(1_800_000_000_001))
+        analytics.sync_to_duckdb()
+        # The next sync targets the file the reader has open
+        _add_requests(_request_id(1_800_000_000_002))
+        analytics.sync_to_duckdb()
+        assert reader.execute("SELECT count(*) FROM llm_requests").fetchone()[0] == 1
+
+    assert len(_replica_ids()) == 3
+
+
+def test_sync_upgrades_single_file_replica():
+    duckdb_path = get_settings().duckdb_path
+    first = _request_id(1_800_000_000_000)
+    _add_requests(first)
+    with duckdb.connect(duckdb_path) as legacy:
+        legacy.execute(analytics.DUCKDB_SCHEMA)
+        legacy.execute(
+            "INSERT INTO llm_requests VALUES (?, 'test_app', 'test_model', 10.0, NULL, 0)",
+            [first],
+        )
+
+    second = _request_id(1_800_000_000_001)
+    _add_requests(second)
+    analytics.sync_to_duckdb()
+
+    assert os.path.islink(duckdb_path)
+    assert _replica_ids() == [first, second]
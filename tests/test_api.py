@@ -0,0 +1,160 @@
+"""Tests for the batched telemetry writer in api/main.py."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import func, select
+
+import api.main as main
+from database.db import get_session
+from database.models import LLMRequest
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(main, "WRITE_RETRY_DELAY_S", 0)
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def _event(**overrides) -> dict:
+    event = {
+        "app_id": "app",
+        "model_name": "m",
+        "prompt": "p",
+        "response": "r",
+        "latency_ms": 1,
+    }
+    event.update(overrides)
+    return event
+
+
+def _dropped() -> float:
+    return REGISTRY.get_sample_value("telemetry_dropped_total")
+
+
+def test_failed_batch_is_retried_once(monkeypatch, no_retry_delay):
+    calls = []
+
+    def flaky_write(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(main, "_write_batch", flaky_write)
+    dropped_before = _dropped()
+
+    asyncio.run(main._write_batch_with_retry([({}, {}), ({}, {})]))
+
+    assert calls == [2, 2]
+    assert _dropped() == dropped_before
+
+
+def test_batch_failing_twice_is_counted_as_dropped(monkeypatch, no_retry_delay):
+    def failing_write(batch):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(main, "_write_batch", failing_write)
+    dropped_before = _dropped()
+
+    asyncio.run(main._write_batch_with_retry([({}, {})] * 3))
+
+    assert _dropped() == dropped_before + 3
+
+
+def test_bad_row_only_drops_itself(no_retry_delay):
+    events = [
+        main.TelemetryEvent(app_id="app", model_name="m", prompt="p", response="r", latency_ms=1.0)
+        for _ in range(3)
+    ]
+    batch = [main._to_rows(event) for event in events]
+    # Out of SQLite's 64-bit integer range, so this row can never be written
+    batch[1][0]["token_count"] = 2**64
+    dropped_before = _dropped()
+
+    asyncio.run(main._write_batch_with_retry(batch))
+
+    with get_session() as session:
+        stored = session.scalar(select(func.count()).select_from(LLMRequest))
+    assert stored == 2
+    assert _dropped() == dropped_before + 1
+
+
+@pytest.mark.parametrize("field", ["timestamp", "token_count"])
+@pytest.mark.parametrize("value", [-1, 2**63])
+def test_out_of_range_ints_are_rejected(client, field, value):
+    response = client.post("/log", json=_event(**{field: value}))
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", field]
+
+
+def test_out_of_range_ints_are_rejected_in_batch(client):
+    response = client.post("/log/batch", json=[_event(), _event(token_count=2**64)])
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "token_count"]
+
+
+def test_unstorable_metadata_is_rejected(client):
+    # /log/batch parses with pydantic, which keeps integers beyond 64 bits
+    response = client.post("/log/batch", json=[_event(metadata={"user_id": 2**64})])
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 0, "metadata"]
+
+
+def test_batch_is_logged(client):
+    response = client.post("/log/batch", json=[_event(), _event(app_id="other")])
+
+    assert response.status_code == 200
+    assert len(response.json()["request_ids"]) == 2
+
+
+def test_batch_with_invalid_json_is_rejected(client):
+    response = client.post(
+        "/log/batch", content=b"[{", headers={"Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == "body"
+
+
+def test_batch_that_is_not_an_array_is_rejected(client):
+    response = client.post("/log/batch", json=_event())
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body"]
+
+
+def test_batch_body_schema_is_documented(client):
+    operation = client.get("/openapi.json").json()["paths"]["/log/batch"]["post"]
+    schema = operation["requestBody"]["content"]["application/json"]["schema"]
+
+    assert schema["items"]["$ref"] == "#/components/schemas/TelemetryEvent"
+
+
+def test_flush_worker_drains_queue_in_full_batches(monkeypatch):
+    batch_size = main.settings.ingest_batch_size
+    batch_sizes = []
+    monkeypatch.setattr(main, "_write_batch", lambda batch: batch_sizes.append(len(batch)))
+
+    async def run():
+        monkeypatch.setattr(main, "telemetry_queue", asyncio.Queue())
+        for _ in range(2 * batch_size + 1):
+            main.telemetry_queue.put_nowait(({}, {}))
+
+        worker = asyncio.create_task(main.flush_worker())
+        await asyncio.wait_for(main.telemetry_queue.join(), timeout=5)
+        worker.cancel()
+
+    asyncio.run(run())
+
+    # The leftover row is flushed once the flush interval runs out
+    assert batch_sizes == [batch_size, batch_size, 1]
@@ -0,0 +1,24 @@
+"""Tests for database/db.py."""
+
+from sqlalchemy import inspect
+
+from database.db import OBSOLETE_INDEXES, engine, get_pool_stats, init_db
+
+
+def test_pool_overflow_is_not_negative():
+    with engine.connect():
+        stats = get_pool_stats()
+
+    assert stats["checked_out"] >= 1
+    assert stats["overflow"] == 0
+
+
+def test_init_db_drops_obsolete_indexes():
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE INDEX ix_llm_requests_app_id ON llm_requests (app_id)")
+
+    init_db()
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("llm_requests")}
+    assert index_names.isdisjoint(OBSOLETE_INDEXES)
+    assert "idx_app_created_latency" in index_names
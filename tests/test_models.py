@@ -0,0 +1,75 @@
+"""Tests for database/models.py."""
+
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+import database.models as models
+from database.db import get_session
+from database.models import LLMRequest, LLMRequestContent, generate_request_id
+
+
+def _count(session, model) -> int:
+    return session.scalar(select(func.count()).select_from(model))
+
+
+def test_deleting_request_deletes_its_content():
+    with get_session() as session:
+        request = LLMRequest(
+            app_id="test_app",
+            model_name="test_model",
+            latency_ms=12.5,
+            content=LLMRequestContent(prompt="What is AI?", response="A field."),
+        )
+        session.add(request)
+        session.commit()
+
+    with get_session() as session:
+        session.delete(session.get(LLMRequest, request.id))
+        session.commit()
+
+        assert _count(session, LLMRequest) == 0
+        assert _count(session, LLMRequestContent) == 0
+
+
+def test_content_round_trips_through_compression():
+    with get_session() as session:
+        request = LLMRequest(
+            app_id="test_app",
+            model_name="test_model",
+            latency_ms=1.0,
+            content=LLMRequestContent(prompt="héllo " * 100, response="wörld"),
+        )
+        session.add(request)
+        session.commit()
+
+    with get_session() as session:
+        content = session.get(LLMRequestContent, request.id)
+        assert content.prompt == "héllo " * 100
+        assert content.response == "wörld"
+
+
+@pytest.fixture
+def fallback_ids(monkeypatch):
+    """Use the pre-3.14 generator even where uuid.uuid7 exists."""
+    monkeypatch.delattr(uuid, "uuid7", raising=False)
+
+
+def test_fallback_ids_strictly_increase_within_a_millisecond(fallback_ids, monkeypatch):
+    monkeypatch.setattr(models, "now_ms", lambda: 1_700_000_000_000)
+
+    # More ids than the 12-bit counter holds, all in one millisecond
+    ids = [generate_request_id() for _ in range(5000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(uuid.UUID(hex=i).version == 7 for i in ids)
+
+
+def test_fallback_ids_increase_when_clock_steps_back(fallback_ids, monkeypatch):
+    monkeypatch.setattr(models, "now_ms", lambda: 1_700_000_000_000)
+    first = generate_request_id()
+    monkeypatch.setattr(models, "now_ms", lambda: 1_699_999_999_000)
+
+    assert generate_request_id() > first
@@ -0,0 +1,17 @@
+"""Tests for engine configuration in config/settings.py."""
+
+from config.settings import get_settings
+from database.db import engine
+
+
+def _pragma(name: str):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_busy_timeout_comes_from_settings():
+    assert _pragma("busy_timeout") == get_settings().sqlite_busy_timeout_ms
+
+
+def test_wal_enabled():
+    assert _pragma("journal_mode") == "wal"